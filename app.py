@@ -2,24 +2,70 @@ import streamlit as st
 from dotenv import load_dotenv
 import os
 import re
+import asyncio
+import hashlib
+import math
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+import diskcache
+import orjson
 import requests
-from PIL import Image
-from io import BytesIO
+from requests.adapters import HTTPAdapter
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_exponential
 import io
-import google.generativeai as genai
-from youtube_transcript_api import YouTubeTranscriptApi, NoTranscriptFound, TranscriptsDisabled
-import pandas as pd
-import base64
+import numpy as np
 from datetime import datetime
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet
+
+try:
+    # Optional DFA-based engine (google-re2); same API as `re` for our patterns
+    import re2
+    _fast_compile = re2.compile
+except ImportError:
+    # re2's \b is ASCII-only, so match that to clean text the same either way
+    _fast_compile = partial(re.compile, flags=re.ASCII)
 
 # Load environment variables
 load_dotenv()
 
-# Configure Gemini API
-genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+# Precompiled patterns
+_VIDEO_ID_RE = _fast_compile(r'(?:v=|/|youtu\.be/|youtube\.com/embed/)([0-9A-Za-z_-]{11})')
+_FILLER_RE = _fast_compile(r'(?i)\b(?:um|uh|like|you know|sort of|kind of)\b')
+_DUR_RE = re.compile(r'PT(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?')
+_SENTENCE_RE = re.compile(r'(?<=[.!?])\s+')
+_WORD_RE = re.compile(r"[a-z0-9']+")
+_MD_PREFIX_RE = re.compile(r'(#{1,3} |- )')
+
+# Markdown line prefix -> (PDF style name, text marker)
+MD_PREFIX_STYLES = {
+    '# ': ('Heading1', ''),
+    '## ': ('Heading2', ''),
+    '### ': ('Heading3', ''),
+    '- ': ('BodyText', '• ')
+}
+
+YOUTUBE_VIDEOS_URL = "https://www.googleapis.com/youtube/v3/videos"
+
+# Bump when prompts or transcript cleaning change so stale cached summaries are not reused
+PROMPT_VERSION = 4
+SUMMARY_CACHE_TTL = 7 * 86400  # seconds
+VIDEO_CACHE_TTL = 7 * 86400  # seconds
+TRANSCRIPT_CACHE_TTL = 30 * 86400  # seconds
+
+# Long transcripts are trimmed extractively before summarizing (not for notes,
+# which need full coverage)
+PRECONDENSE_THRESHOLD = 60_000  # characters
+PRECONDENSE_TARGET = 30_000  # characters
+PRECONDENSE_TYPES = {"concise", "detailed"}
+
+# Chapter summaries of longer transcripts are built from section summaries
+# generated in parallel (map-reduce) instead of truncating the transcript
+CHAPTER_DIRECT_LIMIT = 15_000  # characters
+CHAPTER_CHUNK_CHARS = 8_000  # characters
+CHAPTER_MAX_WORKERS = 5  # concurrent Gemini requests
+
+# Summary types generated in the background as soon as a video is processed
+PREFETCH_TYPES = ("concise", "notes")
 
 # Page configuration
 st.set_page_config(
@@ -28,55 +74,124 @@ st.set_page_config(
     layout="wide"
 )
 
+# Shared resources
+@st.cache_resource
+def _session():
+    """Keep-alive HTTP session shared by all YouTube requests"""
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(pool_connections=10, pool_maxsize=10))
+    return session
+
+def _gemini_api_key():
+    """Gemini API key from the .env file, or the one entered in the sidebar"""
+    return os.getenv("GOOGLE_API_KEY") or st.session_state.get("gemini_api_key")
+
+@st.cache_resource
+def _gemini(api_key):
+    """Gemini model for an API key, shared by sessions using the same key"""
+    import google.generativeai as genai
+    from google.generativeai import client as genai_client
+    
+    # genai.configure is process-wide, so bind this key's client to the model
+    # now; otherwise configuring another key would switch this model too
+    genai.configure(api_key=api_key)
+    model = genai.GenerativeModel("gemini-1.5-pro")
+    model._client = genai_client.get_default_generative_client()
+    return model
+
+@st.cache_resource
+def _executor():
+    """Thread pool for background summary prefetching"""
+    return ThreadPoolExecutor(max_workers=4)
+
+@st.cache_resource
+def _pdf_styles():
+    """ReportLab sample stylesheet, built once and shared by all PDF exports"""
+    from reportlab.lib.styles import getSampleStyleSheet
+    
+    return getSampleStyleSheet()
+
+@st.cache_resource
+def _disk_cache():
+    """Persistent cache for API responses and generated summaries, shared across sessions"""
+    return diskcache.Cache(os.path.expanduser("~/.yt_summarizer"))
+
+def _summary_cache_key(video_id, summary_type):
+    """Build the disk cache key for a generated summary"""
+    return hashlib.sha256(f"{video_id}:{summary_type}:{PROMPT_VERSION}".encode()).hexdigest()
+
 # Helper functions
 def extract_video_id(url):
     """Extract YouTube video ID from various URL formats"""
-    patterns = [
-        r'(?:v=|\/)([0-9A-Za-z_-]{11}).*',  # Standard and mobile youtube.com URLs
-        r'(?:youtu\.be\/)([0-9A-Za-z_-]{11})',  # Short youtu.be URLs
-        r'(?:youtube\.com\/embed\/)([0-9A-Za-z_-]{11})'  # Embedded player URLs
-    ]
-    
-    for pattern in patterns:
-        match = re.search(pattern, url)
-        if match:
-            return match.group(1)
+    # Covers youtube.com/watch?v=, youtu.be/ and youtube.com/embed/ URLs
+    match = _VIDEO_ID_RE.search(url)
+    if match:
+        return match.group(1)
     return None
 
-def validate_youtube_url(url):
+def _video_query(video_id, api_key):
+    """Query parameters for the YouTube API videos endpoint"""
+    return {"id": video_id, "key": api_key, "part": "snippet,contentDetails,statistics"}
+
+def fetch_video_info(video_id):
+    """Fetch the raw YouTube API response for a video (None without an API key)"""
+    api_key = os.getenv("YOUTUBE_API_KEY")
+    if not api_key:
+        return None
+    
+    cached_data = _disk_cache().get(f"video:{video_id}")
+    if cached_data is not None:
+        return cached_data
+    
+    response = _session().get(YOUTUBE_VIDEOS_URL, params=_video_query(video_id, api_key), timeout=5)
+    data = orjson.loads(response.content)
+    if data.get('items'):
+        _disk_cache().set(f"video:{video_id}", data, expire=VIDEO_CACHE_TTL)
+    return data
+
+def _thumbnail_exists(video_id):
+    """Check whether the video thumbnail exists (missing videos return 404)"""
+    thumbnail_url = f"https://img.youtube.com/vi/{video_id}/0.jpg"
+    response = _session().head(thumbnail_url, timeout=3, allow_redirects=True)
+    return response.status_code == 200
+
+def validate_youtube_url(url, video_data=None, thumbnail_exists=None):
     """Validate if the URL is a proper YouTube URL and the video exists"""
     video_id = extract_video_id(url)
     if not video_id:
         return False, "Invalid YouTube URL format"
     
-    # Check if video exists via YouTube API
-    api_key = os.getenv("YOUTUBE_API_KEY")
-    if api_key:
+    # Check if video exists via YouTube API (reuse prefetched data if given)
+    if video_data is None:
         try:
-            response = requests.get(f"https://www.googleapis.com/youtube/v3/videos?id={video_id}&key={api_key}&part=snippet,contentDetails,statistics")
-            data = response.json()
-            if not data.get('items'):
-                return False, "Video not found or may be private"
-            return True, data['items'][0]
+            video_data = fetch_video_info(video_id)
         except Exception as e:
             # Fallback to basic validation if API call fails
             pass
     
-    # Basic validation by checking if thumbnail exists
+    if video_data is not None:
+        if not video_data.get('items'):
+            return False, "Video not found or may be private"
+        return True, video_data['items'][0]
+    
+    # Basic validation by checking if thumbnail exists (missing videos return 404)
     try:
-        thumbnail_url = f"https://img.youtube.com/vi/{video_id}/0.jpg"
-        response = requests.get(thumbnail_url)
-        if response.status_code == 200:
-            # Check if it's the default "no thumbnail" image
-            img = Image.open(BytesIO(response.content))
-            if img.size != (120, 90):  # Default size for missing thumbnails
-                return True, "Video exists (basic validation)"
+        if thumbnail_exists is None:
+            thumbnail_exists = _thumbnail_exists(video_id)
+        if thumbnail_exists:
+            return True, "Video exists (basic validation)"
         return False, "Video not found or may be private"
     except Exception as e:
         return False, f"Error validating URL: {str(e)}"
 
-def get_video_metadata(video_id):
-    """Get video metadata using YouTube API"""
+@st.cache_data(ttl=3600, show_spinner=False)
+def _fetch_video_item(video_id):
+    """Fetch a video's API item (None if not found), raising on errors so they are not cached"""
+    data = fetch_video_info(video_id)
+    return data['items'][0] if data.get('items') else None
+
+def get_video_metadata(video_id, prefetched=None):
+    """Get video metadata using YouTube API (or an already fetched video item)"""
     api_key = os.getenv("YOUTUBE_API_KEY")
     if not api_key:
         return {
@@ -89,17 +204,16 @@ def get_video_metadata(video_id):
         }
     
     try:
-        response = requests.get(f"https://www.googleapis.com/youtube/v3/videos?id={video_id}&key={api_key}&part=snippet,contentDetails,statistics")
-        data = response.json()
-        
-        if not data.get('items'):
+        video_data = prefetched if prefetched is not None else _fetch_video_item(video_id)
+        if video_data is None:
             return None
         
-        video_data = data['items'][0]
-        
         # Convert duration from ISO 8601 format
         duration = video_data['contentDetails']['duration']
-        duration = duration.replace('PT', '').replace('H', 'h ').replace('M', 'm ').replace('S', 's')
+        match = _DUR_RE.match(duration)
+        if match:
+            # Only non-empty components, e.g. "1h 5s" or "4m 13s"
+            duration = " ".join(f"{value}{unit}" for value, unit in zip(match.groups(), "hms") if value) or "0s"
         
         return {
             "title": video_data['snippet']['title'],
@@ -120,38 +234,74 @@ def get_video_metadata(video_id):
             "video_id": video_id
         }
 
+def _format_timestamps(starts):
+    """Format an array of start times in seconds as MM:SS strings"""
+    if starts.size == 0:
+        return []
+    
+    minutes, seconds = np.divmod(starts, 60)
+    timestamps = np.char.add(
+        np.char.add(np.char.zfill(minutes.astype(str), 2), ":"),
+        np.char.zfill(seconds.astype(str), 2)
+    )
+    return timestamps.tolist()
+
+def _is_transient_transcript_error(exc):
+    """Check whether a transcript fetch failed due to throttling or the network"""
+    import youtube_transcript_api
+    
+    # Throttling exception names differ between youtube-transcript-api releases
+    throttling_errors = tuple(
+        getattr(youtube_transcript_api, name)
+        for name in ("TooManyRequests", "RequestBlocked", "YouTubeRequestFailed")
+        if hasattr(youtube_transcript_api, name)
+    )
+    return isinstance(exc, (requests.RequestException,) + throttling_errors)
+
+@retry(
+    retry=retry_if_exception(_is_transient_transcript_error),
+    wait=wait_exponential(multiplier=1, min=1, max=30),
+    stop=stop_after_attempt(5),
+    reraise=True
+)
+def _fetch_transcript_data(video_id):
+    """Fetch raw transcript entries, retrying with backoff when YouTube throttles"""
+    from youtube_transcript_api import YouTubeTranscriptApi
+    
+    return YouTubeTranscriptApi.get_transcript(video_id)
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def _load_transcript(video_id):
+    """Fetch and format a transcript, raising on errors so they are not cached"""
+    # Get transcript from the disk cache, or directly from YouTube
+    transcript_data = _disk_cache().get(f"transcript:{video_id}")
+    if transcript_data is None:
+        transcript_data = _fetch_transcript_data(video_id)
+        _disk_cache().set(f"transcript:{video_id}", transcript_data, expire=TRANSCRIPT_CACHE_TTL)
+    
+    # Format the transcript
+    full_transcript = " ".join(entry['text'] for entry in transcript_data)
+    
+    # Timestamps formatted as MM:SS, computed for all entries at once
+    starts = np.fromiter((entry['start'] for entry in transcript_data), dtype=np.int32, count=len(transcript_data))
+    timestamped_transcript = [
+        {"timestamp": timestamp, "text": entry['text']}
+        for timestamp, entry in zip(_format_timestamps(starts), transcript_data)
+    ]
+    
+    return {
+        "full_text": full_transcript.strip(),
+        "timestamped": timestamped_transcript,
+        "source": "YouTube Captions",
+        "video_id": video_id
+    }
+
 def extract_transcript(video_id):
     """Extract transcript from YouTube video"""
-    try:
-        # Get transcript directly
-        transcript_data = YouTubeTranscriptApi.get_transcript(video_id)
-        
-        # Format the transcript
-        full_transcript = ""
-        timestamped_transcript = []
-        
-        for entry in transcript_data:
-            # Format timestamp as MM:SS
-            timestamp = int(entry['start'])
-            minutes = timestamp // 60
-            seconds = timestamp % 60
-            formatted_time = f"{minutes:02d}:{seconds:02d}"
-            
-            # Add to full transcript
-            full_transcript += f"{entry['text']} "
-            
-            # Add to timestamped transcript
-            timestamped_transcript.append({
-                "timestamp": formatted_time,
-                "text": entry['text']
-            })
-        
-        return {
-            "full_text": full_transcript.strip(),
-            "timestamped": timestamped_transcript,
-            "source": "YouTube Captions"
-        }
+    from youtube_transcript_api import NoTranscriptFound, TranscriptsDisabled
     
+    try:
+        return _load_transcript(video_id)
     except NoTranscriptFound:
         return {"error": "No transcript found for this video"}
     except TranscriptsDisabled:
@@ -159,44 +309,96 @@ def extract_transcript(video_id):
     except Exception as e:
         return {"error": f"Error extracting transcript: {str(e)}"}
 
+async def _fetch_all(video_id):
+    """Fetch YouTube API data (or thumbnail status) and transcript concurrently"""
+    # Returns (video_data, thumbnail_exists, transcript); the thumbnail is only
+    # checked when no YouTube API key is configured
+    # The transcript API is blocking, so run it in the default thread pool
+    loop = asyncio.get_running_loop()
+    transcript_future = loop.run_in_executor(None, extract_transcript, video_id)
+    
+    # Same blocking checks validate_youtube_url would run, but overlapped
+    # with the transcript fetch; failures fall back to validation's own retry
+    has_api_key = bool(os.getenv("YOUTUBE_API_KEY"))
+    check_future = loop.run_in_executor(None, fetch_video_info if has_api_key else _thumbnail_exists, video_id)
+    result, transcript = await asyncio.gather(check_future, transcript_future, return_exceptions=True)
+    if isinstance(result, Exception):
+        result = None
+    
+    if has_api_key:
+        return result, None, transcript
+    return None, result, transcript
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def _timestamped_table(video_id, _timestamped):
+    """Build the timestamped transcript table once per video"""
+    import pyarrow as pa
+    
+    return pa.Table.from_pylist(_timestamped)
+
 def preprocess_transcript(transcript):
     """Clean and preprocess transcript text"""
     if "error" in transcript:
         return transcript
     
     # Clean filler words
-    text = transcript["full_text"]
-    filler_words = ["um", "uh", "like", "you know", "sort of", "kind of"]
-    for word in filler_words:
-        text = re.sub(r'\b' + word + r'\b', '', text, flags=re.IGNORECASE)
+    text = _FILLER_RE.sub('', transcript["full_text"])
     
-    # Remove duplicate spaces
-    text = re.sub(r'\s+', ' ', text).strip()
+    # Remove duplicate spaces (str.split collapses whitespace runs in C)
+    text = " ".join(text.split())
     
     transcript["full_text"] = text
     return transcript
 
-def generate_summary(transcript, summary_type="concise"):
-    """Generate summary using Gemini API"""
-    if "error" in transcript:
-        return transcript["error"]
+def _generate_text(model, prompt, placeholder=None):
+    """Run a Gemini prompt, streaming partial output into placeholder if given"""
+    if placeholder is None:
+        return model.generate_content(prompt).text
     
-    model = genai.GenerativeModel("gemini-1.5-pro")
+    parts = []
+    for chunk in model.generate_content(prompt, stream=True):
+        parts.append(chunk.text)
+        placeholder.markdown("".join(parts))
+    return "".join(parts)
+
+def _precondense(text, target_chars=PRECONDENSE_TARGET):
+    """Keep the highest TF-IDF sentences of text, in original order, within target_chars"""
+    sentences = []
+    for sentence in _SENTENCE_RE.split(text):
+        # Auto-generated captions are often unpunctuated, so cap pieces at 40 words
+        words = sentence.split()
+        sentences.extend(" ".join(words[i:i + 40]) for i in range(0, len(words), 40))
     
-    prompts = {
-        "concise": """You are a YouTube video summarizer expert. Provide a concise summary of the video transcript below in 3-5 bullet points. Focus on the main ideas and key takeaways only. Keep the total summary within 250 words. Make it easy to understand and skim.
+    # Score each sentence by the mean IDF of its terms (its mean TF-IDF weight)
+    sentence_terms = [_WORD_RE.findall(sentence.lower()) for sentence in sentences]
+    doc_freq = Counter(term for terms in sentence_terms for term in set(terms))
+    idf = {term: math.log(len(sentences) / freq) for term, freq in doc_freq.items()}
+    scores = [sum(idf[term] for term in terms) / len(terms) if terms else 0.0 for terms in sentence_terms]
+    
+    keep = []
+    used = 0
+    for i in sorted(range(len(sentences)), key=scores.__getitem__, reverse=True):
+        if used + len(sentences[i]) + 1 <= target_chars:
+            keep.append(i)
+            used += len(sentences[i]) + 1
+    
+    return " ".join(sentences[i] for i in sorted(keep))
+
+# Prompt prefixes for each summary type (the transcript is appended)
+PROMPTS = {
+    "concise": """You are a YouTube video summarizer expert. Provide a concise summary of the video transcript below in 3-5 bullet points. Focus on the main ideas and key takeaways only. Keep the total summary within 250 words. Make it easy to understand and skim.
 
 Transcript:
 """,
-        "detailed": """You are a YouTube video summarizer expert. Provide a detailed summary of the video transcript below in well-structured paragraphs. Include the main ideas, key points, and important examples. Keep the total summary within 500 words. Make it comprehensive yet easy to understand.
+    "detailed": """You are a YouTube video summarizer expert. Provide a detailed summary of the video transcript below in well-structured paragraphs. Include the main ideas, key points, and important examples. Keep the total summary within 500 words. Make it comprehensive yet easy to understand.
 
 Transcript:
 """,
-        "chapter": """You are a YouTube video summarizer expert. Create a chapter-based summary of the video transcript below. Identify major topics and create logical chapters with headings. Under each chapter, provide a brief summary of the content. Include timestamps where possible. Keep the total summary within 500 words.
+    "chapter": """You are a YouTube video summarizer expert. Create a chapter-based summary of the video transcript below. Identify major topics and create logical chapters with headings. Under each chapter, provide a brief summary of the content. Include timestamps where possible. Keep the total summary within 500 words.
 
 Transcript:
 """,
-        "notes": """You are a professional note-taker. Transform the following video transcript into structured, actionable study notes. Include:
+    "notes": """You are a professional note-taker. Transform the following video transcript into structured, actionable study notes. Include:
 1. INTRODUCTION: Brief overview of the video's topic
 2. KEY POINTS: Main concepts and ideas
 3. ACTION ITEMS: Specific tasks or applications mentioned
@@ -207,21 +409,35 @@ Use bullet points and keep the notes organized, concise, and easy to reference.
 
 Transcript:
 """
-    }
+}
+
+def generate_summary(transcript, summary_type="concise", placeholder=None, api_key=None):
+    """Generate summary using Gemini API, raising on failure so errors are not kept"""
+    if "error" in transcript:
+        raise ValueError(transcript["error"])
     
-    try:
-        response = model.generate_content(prompts[summary_type] + transcript["full_text"])
-        return response.text
-    except Exception as e:
-        return f"Error generating summary: {str(e)}"
+    cache_key = _summary_cache_key(transcript["video_id"], summary_type)
+    cached_summary = _disk_cache().get(cache_key)
+    if cached_summary is not None:
+        return cached_summary
+    
+    model = _gemini(api_key or _gemini_api_key())
+    
+    text = transcript["full_text"]
+    if summary_type in PRECONDENSE_TYPES and len(text) > PRECONDENSE_THRESHOLD:
+        text = _precondense(text)
+    
+    summary = _generate_text(model, PROMPTS[summary_type] + text, placeholder)
+    _disk_cache().set(cache_key, summary, expire=SUMMARY_CACHE_TTL)
+    return summary
 
 # Advanced summary generation function (for future use)
-def generate_advanced_summary(transcript, options):
+def generate_advanced_summary(transcript, options, placeholder=None, api_key=None):
     """Generate more customized summaries with advanced options"""
     if "error" in transcript:
         return transcript["error"]
     
-    model = genai.GenerativeModel("gemini-1.5-pro")
+    model = _gemini(api_key or _gemini_api_key())
     
     # Build prompt based on options
     prompt = f"""You are a YouTube video summarizer expert. Create a summary of the video transcript below based on the following requirements:
@@ -236,8 +452,7 @@ Transcript:
 """
     
     try:
-        response = model.generate_content(prompt)
-        return response.text
+        return _generate_text(model, prompt, placeholder)
     except Exception as e:
         return f"Error generating summary: {str(e)}"
 
@@ -251,16 +466,61 @@ def transcribe_audio(video_id):
     # 3. Processing the returned transcript
     return {"error": "Fallback transcription not implemented yet"}
 
+def _chunk_timestamped(timestamped, max_chars=CHAPTER_CHUNK_CHARS):
+    """Group timestamped transcript entries into (start timestamp, text) chunks"""
+    chunks = []
+    start, parts, size = None, [], 0
+    for entry in timestamped:
+        if start is None:
+            start = entry["timestamp"]
+        parts.append(entry["text"])
+        size += len(entry["text"]) + 1
+        if size >= max_chars:
+            chunks.append((start, " ".join(parts)))
+            start, parts, size = None, [], 0
+    if parts:
+        chunks.append((start, " ".join(parts)))
+    return chunks
+
+def _summarize_sections(model, chunks):
+    """Summarize transcript chunks concurrently and label each with its start time"""
+    section_prompts = [
+        f"""Summarize this part of a YouTube video transcript in 3-5 sentences. It starts at {start}. Cover the topics in the order they are discussed.
+
+Transcript:
+{text}
+"""
+        for start, text in chunks
+    ]
+    with ThreadPoolExecutor(max_workers=min(len(section_prompts), CHAPTER_MAX_WORKERS)) as executor:
+        section_summaries = list(executor.map(partial(_generate_text, model), section_prompts))
+    
+    return "\n\n".join(f"[{start}] {summary}" for (start, _), summary in zip(chunks, section_summaries))
+
 # Function to generate chapter-based summary with timestamps
-def generate_chapter_summary(transcript):
-    """Generate chapter-based summary with timestamps"""
+def generate_chapter_summary(transcript, placeholder=None, api_key=None):
+    """Generate chapter-based summary with timestamps, raising on failure"""
     if "error" in transcript:
-        return transcript["error"]
+        raise ValueError(transcript["error"])
     
-    model = genai.GenerativeModel("gemini-1.5-pro")
+    cache_key = _summary_cache_key(transcript["video_id"], "chapter-based")
+    cached_summary = _disk_cache().get(cache_key)
+    if cached_summary is not None:
+        return cached_summary
     
-    # Prompt Gemini to identify chapters directly
-    chapter_prompt = f"""Analyze this YouTube video transcript and identify 5-7 main sections or topics.
+    model = _gemini(api_key or _gemini_api_key())
+    
+    try:
+        if len(transcript["full_text"]) > CHAPTER_DIRECT_LIMIT:
+            # Map: summarize transcript sections in parallel, keeping their timestamps
+            source_label = "Timestamped section summaries of the transcript"
+            source = _summarize_sections(model, _chunk_timestamped(transcript["timestamped"]))
+        else:
+            source_label = "Transcript"
+            source = transcript["full_text"]
+        
+        # Reduce: prompt Gemini to identify chapters directly
+        chapter_prompt = f"""Analyze this YouTube video transcript and identify 5-7 main sections or topics.
 For each section, provide:
 1. A descriptive title
 2. An approximate timestamp (MM:SS format)
@@ -275,13 +535,11 @@ Brief summary of the introduction...
 ## [05:30] Main Topic
 Brief summary of this section...
 
-Transcript:
-{transcript["full_text"][:15000]}  # Limit transcript length to avoid token limits
+{source_label}:
+{source}
 """
-    
-    try:
-        response = model.generate_content(chapter_prompt)
-        chapter_summary = response.text
+        
+        chapter_summary = _generate_text(model, chapter_prompt, placeholder)
         
         # If no clear chapters were identified, try a different approach
         if "##" not in chapter_summary:
@@ -302,13 +560,14 @@ Summary text...
 
 And so on. Focus on creating a useful breakdown of the video content.
 
-Transcript:
-{transcript["full_text"][:15000]}
+{source_label}:
+{source}
 """
-            response = model.generate_content(structured_prompt)
-            chapter_summary = response.text
+            chapter_summary = _generate_text(model, structured_prompt, placeholder)
         
-        return "# Chapter-Based Summary\n\n" + chapter_summary
+        chapter_summary = "# Chapter-Based Summary\n\n" + chapter_summary
+        _disk_cache().set(cache_key, chapter_summary, expire=SUMMARY_CACHE_TTL)
+        return chapter_summary
     
     except Exception as e:
         # In case of any error, fall back to regular summary
@@ -319,18 +578,20 @@ For each section, provide a concise summary of the key points.
 Transcript:
 {transcript["full_text"][:15000]}
 """
-        try:
-            response = model.generate_content(fallback_prompt)
-            return "# Structured Summary\n\n" + response.text
-        except:
-            return "Error generating chapter-based summary. Please try a different summary type."
+        return "# Structured Summary\n\n" + _generate_text(model, fallback_prompt, placeholder)
 
 # Function to generate PDF
+@st.cache_data(ttl=3600, show_spinner=False)
 def generate_pdf(content, title):
-    """Generate a PDF from content"""
+    """Generate a PDF from content and return its bytes"""
+    from reportlab.lib.pagesizes import letter
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
+    
     buffer = io.BytesIO()
     doc = SimpleDocTemplate(buffer, pagesize=letter)
-    styles = getSampleStyleSheet()
+    styles = _pdf_styles()
+    body_style = styles['BodyText']
+    prefix_styles = {prefix: (styles[name], marker) for prefix, (name, marker) in MD_PREFIX_STYLES.items()}
     
     # Convert content to PDF-compatible format
     flowables = []
@@ -342,42 +603,21 @@ def generate_pdf(content, title):
     # Process content - split by lines and convert to paragraphs
     for line in content.split('\n'):
         if line.strip():
-            if line.startswith('# '):
-                # Main heading
-                flowables.append(Paragraph(line[2:], styles['Heading1']))
-            elif line.startswith('## '):
-                # Subheading
-                flowables.append(Paragraph(line[3:], styles['Heading2']))
-            elif line.startswith('### '):
-                # Sub-subheading
-                flowables.append(Paragraph(line[4:], styles['Heading3']))
-            elif line.startswith('- '):
-                # Bullet point
-                flowables.append(Paragraph(f"• {line[2:]}", styles['BodyText']))
+            match = _MD_PREFIX_RE.match(line)
+            if match:
+                # Heading or bullet point, styled by its Markdown prefix
+                prefix = match.group(1)
+                style, marker = prefix_styles[prefix]
+                flowables.append(Paragraph(marker + line[len(prefix):], style))
             else:
                 # Regular paragraph
-                flowables.append(Paragraph(line, styles['BodyText']))
+                flowables.append(Paragraph(line, body_style))
             
             flowables.append(Spacer(1, 6))
     
     # Build PDF
     doc.build(flowables)
-    buffer.seek(0)
-    return buffer
-
-# Function to create download link for PDF
-def create_download_link_pdf(pdf_bytes, filename, link_text):
-    """Create a download link for PDF content"""
-    b64 = base64.b64encode(pdf_bytes.getvalue()).decode()
-    href = f'<a href="data:application/pdf;base64,{b64}" download="{filename}">{link_text}</a>'
-    return href
-
-# Function to create download link for txt
-def create_download_link(content, filename, link_text):
-    """Create a download link for text content"""
-    b64 = base64.b64encode(content.encode()).decode()
-    href = f'<a href="data:file/txt;base64,{b64}" download="{filename}">{link_text}</a>'
-    return href
+    return buffer.getvalue()
 
 
 # Function to create Markdown export
@@ -400,11 +640,25 @@ Generated on {datetime.now().strftime('%Y-%m-%d')} using YouTube Summarizer App
     return markdown
 
 
+# Function to use a prefetched summary if available
+def get_prefetched_summary(transcript, summary_type, placeholder=None):
+    """Return the background-prefetched summary for summary_type, or generate it now"""
+    future = st.session_state.prefetch.pop(summary_type, None)
+    # Generate directly if the job is still queued behind other sessions' work
+    # (cancel succeeds) or it failed
+    if future is not None and not future.cancel():
+        try:
+            return future.result()
+        except Exception:
+            pass
+    return generate_summary(transcript, summary_type, placeholder)
+
+
 # Initialize session state for persistent data
-if 'summary' not in st.session_state:
-    st.session_state.summary = None
-if 'notes' not in st.session_state:
-    st.session_state.notes = None
+if 'summaries' not in st.session_state:
+    st.session_state.summaries = {}
+if 'prefetch' not in st.session_state:
+    st.session_state.prefetch = {}
 if 'transcript' not in st.session_state:
     st.session_state.transcript = None
 if 'metadata' not in st.session_state:
@@ -424,9 +678,8 @@ def main():
         # API key input
         if not os.getenv("GOOGLE_API_KEY"):
             st.warning("⚠️ Gemini API key not found in .env file")
-            api_key = st.text_input("Enter your Gemini API key:", type="password")
-            if api_key:
-                genai.configure(api_key=api_key)
+            # Kept per session in st.session_state.gemini_api_key
+            st.text_input("Enter your Gemini API key:", type="password", key="gemini_api_key")
         
         # About section
         st.markdown("---")
@@ -467,15 +720,18 @@ def main():
             st.error("❌ Invalid YouTube URL. Please check and try again.")
             return
         
+        # Fetch video data and transcript concurrently
+        with st.spinner("Fetching video metadata and transcript..."):
+            video_data, thumbnail_exists, transcript = asyncio.run(_fetch_all(video_id))
+        
         # URL validation
-        is_valid, result = validate_youtube_url(youtube_url)
+        is_valid, result = validate_youtube_url(youtube_url, video_data, thumbnail_exists)
         if not is_valid:
             st.error(f"❌ {result}")
             return
         
-        # Get video metadata
-        with st.spinner("Fetching video metadata..."):
-            metadata = get_video_metadata(video_id)
+        # Get video metadata, reusing the video item returned by validation
+        metadata = get_video_metadata(video_id, result if isinstance(result, dict) else None)
         
         if not metadata:
             st.error("❌ Could not retrieve video metadata.")
@@ -484,18 +740,25 @@ def main():
         # Store metadata in session state
         st.session_state.metadata = metadata
         
-        # Extract transcript
-        with st.spinner("Extracting transcript..."):
-            transcript = extract_transcript(video_id)
-            transcript = preprocess_transcript(transcript)
+        # Clean the transcript
+        transcript = preprocess_transcript(transcript)
         
         if "error" in transcript:
             st.error(f"❌ {transcript['error']}")
             return
         
-        # Store transcript in session state
+        # Store transcript in session state (summaries and notes belong to the previous video)
         st.session_state.transcript = transcript
+        st.session_state.summaries = {}
         st.session_state.video_processed = True
+        
+        # Start the summaries users usually open first in the background
+        # (only once a Gemini key is set, or every prefetch would just fail)
+        api_key = _gemini_api_key()
+        st.session_state.prefetch = {
+            summary_type: _executor().submit(generate_summary, transcript, summary_type, api_key=api_key)
+            for summary_type in PREFETCH_TYPES
+        } if api_key else {}
     
     # Display processed video if available
     if st.session_state.video_processed and st.session_state.metadata:
@@ -524,113 +787,117 @@ def main():
                 key="summary_type"
             )
             
-            # Store the previous summary type to detect changes
-            if 'prev_summary_type' not in st.session_state:
-                st.session_state.prev_summary_type = summary_type
-            
             generate_summary_clicked = st.button("Generate Summary", key="gen_summary")
+            summary_key = summary_type.lower()
             
-            # Only generate summary if button is clicked, not when radio changes
-            if generate_summary_clicked or st.session_state.get('summary_generated', False):
-                with st.spinner("Generating summary..."):
-                    # Generate summary only if button is clicked OR it's the first time loading with existing summary
-                    if generate_summary_clicked:
-                        # Reset current summary if type changed with button click
-                        if summary_type.lower() != st.session_state.get('current_summary_type', ''):
-                            st.session_state.summary = None
-                        
-                        # Generate the new summary
-                        if not st.session_state.get('summary'):
-                            if summary_type.lower() == "chapter-based":
-                                summary = generate_chapter_summary(transcript)
-                            else:
-                                summary = generate_summary(transcript, summary_type.lower())
-                            st.session_state.summary = summary
-                            st.session_state.current_summary_type = summary_type.lower()
-                    
-                    # Use existing summary if available
-                    summary = st.session_state.summary
-                    st.session_state.summary_generated = True
-                    
+            # Only generate summary if button is clicked, not when radio changes;
+            # summaries are kept per type so switching back to one is instant
+            if generate_summary_clicked or summary_key in st.session_state.summaries:
                 st.markdown("### Summary")
-                st.markdown(summary)
-                
-                # Export options
-                st.markdown("### Export Options")
-                export_col1, export_col2, export_col3 = st.columns(3)
-                
-                with export_col1:
-                    if st.button("📝 Save as txt", key="save_summary_txt"):
-                        filename = f"{metadata['title']}_Summary_{datetime.now().strftime('%Y%m%d')}.txt"
-                        st.markdown(
-                            create_download_link(summary, filename, "📥 Download as Text"),
-                            unsafe_allow_html=True
-                        )
+                summary_placeholder = st.empty()
                 
-                with export_col2:
-                    if st.button("📋 Copy to Clipboard", key="copy_summary"):
-                        st.success("Summary copied to clipboard!")
+                # Only successful summaries are kept, so a failed one is retried on the next click
+                if summary_key not in st.session_state.summaries:
+                    with st.spinner("Generating summary..."):
+                        try:
+                            if summary_key == "chapter-based":
+                                summary = generate_chapter_summary(transcript, summary_placeholder)
+                            else:
+                                summary = get_prefetched_summary(transcript, summary_key, summary_placeholder)
+                            st.session_state.summaries[summary_key] = summary
+                        except Exception as e:
+                            summary_placeholder.error(f"Error generating summary: {str(e)}")
                 
-                with export_col3:
-                    if st.button("📄 Save as PDF", key="save_summary_pdf"):
-                        # Store the summary to make sure it's not lost
-                        temp_summary = st.session_state.summary
-                        
-                        # Generate PDF
-                        pdf_buffer = generate_pdf(temp_summary, f"{metadata['title']} - Summary")
-                        
-                        # Create download link
-                        pdf_filename = f"{metadata['title']}_Summary_{datetime.now().strftime('%Y%m%d')}.pdf"
-                        st.markdown(
-                            create_download_link_pdf(pdf_buffer, pdf_filename, "📥 Download as PDF"),
-                            unsafe_allow_html=True
-                        )
+                if summary_key in st.session_state.summaries:
+                    summary = st.session_state.summaries[summary_key]
+                    summary_placeholder.markdown(summary)
+                    
+                    # Export options
+                    st.markdown("### Export Options")
+                    export_col1, export_col2, export_col3 = st.columns(3)
+                    
+                    with export_col1:
+                        if st.button("📝 Save as txt", key="save_summary_txt"):
+                            filename = f"{metadata['title']}_Summary_{datetime.now().strftime('%Y%m%d')}.txt"
+                            st.download_button(
+                                "📥 Download as Text",
+                                data=summary.encode("utf-8"),
+                                file_name=filename,
+                                mime="text/plain",
+                                key="download_summary_txt"
+                            )
+                    
+                    with export_col2:
+                        if st.button("📋 Copy to Clipboard", key="copy_summary"):
+                            st.success("Summary copied to clipboard!")
+                    
+                    with export_col3:
+                        if st.button("📄 Save as PDF", key="save_summary_pdf"):
+                            # Generate PDF
+                            pdf_bytes = generate_pdf(summary, f"{metadata['title']} - Summary")
+                            
+                            # Create download button
+                            pdf_filename = f"{metadata['title']}_Summary_{datetime.now().strftime('%Y%m%d')}.pdf"
+                            st.download_button(
+                                "📥 Download as PDF",
+                                data=pdf_bytes,
+                                file_name=pdf_filename,
+                                mime="application/pdf",
+                                key="download_summary_pdf"
+                            )
         
         # Study Notes tab
         with tab2:
-            if st.button("Generate Study Notes", key="gen_notes") or st.session_state.get('notes_generated', False):
-                with st.spinner("Generating study notes..."):
-                    if not st.session_state.get('notes'):
-                        notes = generate_summary(transcript, "notes")
-                        st.session_state.notes = notes
-                    else:
-                        notes = st.session_state.notes
-                    
-                    st.session_state.notes_generated = True
-                
+            # Notes are kept with the summaries so they are reset for each new video
+            if st.button("Generate Study Notes", key="gen_notes") or "notes" in st.session_state.summaries:
                 st.markdown("### Study Notes")
-                st.markdown(notes)
+                notes_placeholder = st.empty()
                 
-                # Export options
-                st.markdown("### Export Options")
-                export_col1, export_col2, export_col3 = st.columns(3)
+                if "notes" not in st.session_state.summaries:
+                    with st.spinner("Generating study notes..."):
+                        try:
+                            notes = get_prefetched_summary(transcript, "notes", notes_placeholder)
+                            st.session_state.summaries["notes"] = notes
+                        except Exception as e:
+                            notes_placeholder.error(f"Error generating study notes: {str(e)}")
                 
-                with export_col1:
-                    if st.button("📝 Save as txt", key="save_notes_txt"):
-                        filename = f"{metadata['title']}_Notes_{datetime.now().strftime('%Y%m%d')}.txt"
-                        st.markdown(
-                            create_download_link(notes, filename, "📥 Download as Text"),
-                            unsafe_allow_html=True
-                        )
-                
-                with export_col2:
-                    if st.button("📋 Copy to Clipboard", key="copy_notes"):
-                        st.success("Notes copied to clipboard!")
-                
-                with export_col3:
-                    if st.button("📄 Save as PDF", key="save_notes_pdf"):
-                        # Store the notes to make sure they're not lost
-                        temp_notes = st.session_state.notes
-                        
-                        # Generate PDF
-                        pdf_buffer = generate_pdf(temp_notes, f"{metadata['title']} - Study Notes")
-                        
-                        # Create download link
-                        pdf_filename = f"{metadata['title']}_Notes_{datetime.now().strftime('%Y%m%d')}.pdf"
-                        st.markdown(
-                            create_download_link_pdf(pdf_buffer, pdf_filename, "📥 Download as PDF"),
-                            unsafe_allow_html=True
-                        )
+                if "notes" in st.session_state.summaries:
+                    notes = st.session_state.summaries["notes"]
+                    notes_placeholder.markdown(notes)
+                    
+                    # Export options
+                    st.markdown("### Export Options")
+                    export_col1, export_col2, export_col3 = st.columns(3)
+                    
+                    with export_col1:
+                        if st.button("📝 Save as txt", key="save_notes_txt"):
+                            filename = f"{metadata['title']}_Notes_{datetime.now().strftime('%Y%m%d')}.txt"
+                            st.download_button(
+                                "📥 Download as Text",
+                                data=notes.encode("utf-8"),
+                                file_name=filename,
+                                mime="text/plain",
+                                key="download_notes_txt"
+                            )
+                    
+                    with export_col2:
+                        if st.button("📋 Copy to Clipboard", key="copy_notes"):
+                            st.success("Notes copied to clipboard!")
+                    
+                    with export_col3:
+                        if st.button("📄 Save as PDF", key="save_notes_pdf"):
+                            # Generate PDF
+                            pdf_bytes = generate_pdf(notes, f"{metadata['title']} - Study Notes")
+                            
+                            # Create download button
+                            pdf_filename = f"{metadata['title']}_Notes_{datetime.now().strftime('%Y%m%d')}.pdf"
+                            st.download_button(
+                                "📥 Download as PDF",
+                                data=pdf_bytes,
+                                file_name=pdf_filename,
+                                mime="application/pdf",
+                                key="download_notes_pdf"
+                            )
         
         # Transcript tab
         with tab3:
@@ -647,10 +914,10 @@ def main():
             if display_option == "Plain Text":
                 st.text_area("", transcript["full_text"], height=400)
             else:
-                # Create a dataframe for the timestamped transcript
-                df = pd.DataFrame(transcript["timestamped"])
+                # Arrow table for the timestamped transcript (skips pandas)
+                table = _timestamped_table(transcript["video_id"], transcript["timestamped"])
                 st.dataframe(
-                    df,
+                    table,
                     column_config={
                         "timestamp": st.column_config.TextColumn("Time"),
                         "text": st.column_config.TextColumn("Content")
@@ -667,9 +934,12 @@ def main():
             with export_col1:
                 if st.button("📝 Save as txt", key="save_transcript_txt"):
                     filename = f"{metadata['title']}_Transcript_{datetime.now().strftime('%Y%m%d')}.txt"
-                    st.markdown(
-                        create_download_link(transcript["full_text"], filename, "📥 Download as Text"),
-                        unsafe_allow_html=True
+                    st.download_button(
+                        "📥 Download as Text",
+                        data=transcript["full_text"].encode("utf-8"),
+                        file_name=filename,
+                        mime="text/plain",
+                        key="download_transcript_txt"
                     )
             
             with export_col2:
@@ -679,13 +949,16 @@ def main():
             with export_col3:
                 if st.button("📄 Save as PDF", key="save_transcript_pdf"):
                     # Generate PDF
-                    pdf_buffer = generate_pdf(transcript["full_text"], f"{metadata['title']} - Transcript")
+                    pdf_bytes = generate_pdf(transcript["full_text"], f"{metadata['title']} - Transcript")
                     
-                    # Create download link
+                    # Create download button
                     pdf_filename = f"{metadata['title']}_Transcript_{datetime.now().strftime('%Y%m%d')}.pdf"
-                    st.markdown(
-                        create_download_link_pdf(pdf_buffer, pdf_filename, "📥 Download as PDF"),
-                        unsafe_allow_html=True
+                    st.download_button(
+                        "📥 Download as PDF",
+                        data=pdf_bytes,
+                        file_name=pdf_filename,
+                        mime="application/pdf",
+                        key="download_transcript_pdf"
                     )
 
 # Run the app